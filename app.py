@@ -9,17 +9,31 @@ Author: Shivashish Jaiswal
 License: MIT
 """
 import os
+import re
+import math
+import hashlib
+import io
 import uuid
-import json
+import wave
+import shutil
 import subprocess
+import tempfile
 import time
 import logging
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 import yt_dlp
+import orjson
+import zstandard
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 # Configure logging
@@ -35,11 +49,25 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, for faster jsonify and get_json"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24).hex())
 app.config['UPLOAD_FOLDER'] = Path(__file__).parent / 'downloads'
 app.config['TRANSCRIPTS_FOLDER'] = Path(__file__).parent / 'transcripts'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max
+# Let a fronting nginx/Apache send audio files itself (X-Sendfile)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
 
 # Create directories
 app.config['UPLOAD_FOLDER'].mkdir(exist_ok=True)
@@ -48,183 +76,318 @@ app.config['TRANSCRIPTS_FOLDER'].mkdir(exist_ok=True)
 # Initialize authentication
 from auth import init_auth
 from flask_login import login_required, current_user
+from sqlalchemy import select, delete, update
+from sqlalchemy.orm.exc import StaleDataError, ObjectDeletedError
+from models import db, Podcast, Job, init_transcript_index, index_transcript_chunks, delete_transcript_chunks, get_indexed_podcast_ids, search_transcript_chunks
 init_auth(app)
+with app.app_context():
+    init_transcript_index()
 
 # Smallest AI API configuration
 SMALLEST_API_KEY = os.environ.get("SMALLEST_API_KEY")
 SMALLEST_API_URL = "https://waves-api.smallest.ai/api/v1/pulse/get_text"
 
+# Parallel chunk transcription (workers per request, and a global cap on
+# in-flight API calls shared by all requests to respect rate limits)
+TRANSCRIBE_MAX_WORKERS = int(os.environ.get("TRANSCRIBE_MAX_WORKERS", 4))
+TRANSCRIBE_MAX_CONCURRENT = int(os.environ.get("TRANSCRIBE_MAX_CONCURRENT", 8))
+transcribe_semaphore = threading.Semaphore(TRANSCRIBE_MAX_CONCURRENT)
+
+# Shared session so chunk uploads reuse pooled keep-alive TLS connections,
+# retrying with backoff on connection errors or when the API is rate limiting
+# or briefly unavailable
+smallest_session = requests.Session()
+smallest_session.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=TRANSCRIBE_MAX_CONCURRENT,
+    max_retries=Retry(
+        total=3,
+        read=0,  # Never resend a chunk the API may already be transcribing
+        other=0,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=None,  # Also retry POST uploads
+        raise_on_status=False
+    )
+))
+
+# Audio is sent to the STT API as 16kHz mono 16-bit PCM WAV
+STT_SAMPLE_RATE = 16000
+
 # Ollama configuration (local LLM)
 OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "llama3.2"
-
-# In-memory storage for transcripts (use database in production)
+# The default llama3.2 tag is the 3B instruct model quantized to Q4_K_M; set
+# OLLAMA_MODEL to pick another quantization (e.g. llama3.2:3b-instruct-q8_0)
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2")
+OLLAMA_EMBED_URL = "http://localhost:11434/api/embeddings"
+OLLAMA_EMBED_MODEL = os.environ.get("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+# Context window requested for every generation; keep it the same on every call
+# since changing num_ctx makes Ollama reload the model
+OLLAMA_NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", 8192))
+
+# AI feature prompts get whatever context the response and instructions leave
+# over, measured in tokens (approximated, ~4 characters per token in English)
+AI_FEATURE_NUM_PREDICT = 4000
+AI_FEATURE_PROMPT_OVERHEAD = 512  # Tokens for the feature instructions
+CHARS_PER_TOKEN = 4
+
+# Shared session so Ollama calls reuse pooled keep-alive connections
+ollama_session = requests.Session()
+ollama_session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=16))
+
+# Ollama status is cached briefly since /api/status is polled
+OLLAMA_STATUS_TTL = 2  # seconds
+ollama_status_cache = {'status': None, 'checked_at': 0}
+ollama_status_lock = threading.Lock()
+
+# Chat response cache: exact repeats and semantically similar questions
+# about the same podcast are answered without another LLM call. Expired
+# entries are swept on every insert and the least recently used podcasts are
+# dropped beyond the cap
+CHAT_CACHE_TTL = 60 * 60  # 1 hour
+CHAT_CACHE_MAX_ENTRIES = 64  # Per podcast
+CHAT_CACHE_MAX_PODCASTS = 64
+CHAT_CACHE_SIMILARITY = 0.92  # Minimum cosine similarity for a semantic hit
+chat_cache = {}
+chat_cache_lock = threading.Lock()
+
+# Transcripts and chunks of the podcasts in use, loaded on demand by
+# load_podcast; the least recently used are dropped beyond the cap. Podcast
+# metadata is stored in the database (see models.Podcast)
+PODCAST_CACHE_MAX_ENTRIES = 32
 podcasts_db = {}
+podcasts_db_lock = threading.Lock()
+
+# Background jobs for long-running work (downloads, transcription), so
+# requests return immediately and clients poll /api/job/<job_id>. Job status
+# is stored in the database, so any app process can answer the poll
+JOB_MAX_WORKERS = int(os.environ.get("JOB_MAX_WORKERS", 4))
+JOB_RETENTION = 60 * 60  # Keep finished jobs for 1 hour
+job_executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS)
+
+# AI feature results, cached on disk (keyed by model and prompt) with the
+# most recently generated ones also kept in memory
+AI_CACHE_FOLDER = app.config['TRANSCRIPTS_FOLDER'] / 'ai_cache'
+AI_CACHE_FOLDER.mkdir(exist_ok=True)
+AI_CACHE_MAX_ENTRIES = 256
+ai_feature_cache = {}
+ai_feature_cache_lock = threading.Lock()
+
+# AI features generated in the background right after transcription, one
+# podcast at a time so prefetching never competes much with user requests
+PREFETCH_FEATURES = ["summary", "key_insights", "bullet_points"]
+prefetch_executor = ThreadPoolExecutor(max_workers=1)
+
+# Concurrent Ollama requests for one batch of AI features; match it to the
+# Ollama server's OLLAMA_NUM_PARALLEL so requests don't just queue up there
+AI_FEATURE_BATCH_MAX_WORKERS = int(os.environ.get("AI_FEATURE_BATCH_MAX_WORKERS", 4))
+
+# Buffer size for large file writes (transcripts, downloads)
+FILE_BUFFER_SIZE = 64 * 1024
+
+# Transcript files are zstd-compressed JSON; mostly-English text shrinks ~4-6x
+TRANSCRIPT_COMPRESSION_LEVEL = 6
+
+# Word tokens used for transcript search
+TOKEN_PATTERN = re.compile(r"\w+")
 
 # AI Feature prompts for transcript processing
+# Every prompt starts with the transcript and puts the instructions last, so
+# all features for one podcast share a prompt prefix Ollama can reuse
 AI_FEATURE_PROMPTS = {
     # Popular Features
     "summary": {
         "name": "Summary",
-        "prompt": """Create a comprehensive summary of this podcast/video transcript. Include:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create a comprehensive summary of this podcast/video transcript. Include:
 - Main topic and purpose
 - Key points discussed
 - Important conclusions or takeaways
 - Any action items mentioned
 
-Transcript:
-{transcript}
-
 Provide a well-structured summary:"""
     },
     "key_insights": {
         "name": "Key Insights",
-        "prompt": """Extract the main takeaways and key insights from this transcript. Focus on:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Extract the main takeaways and key insights from this transcript. Focus on:
 - Core messages and themes
 - Important learnings
 - Actionable insights
 - Unique perspectives shared
 
-Transcript:
-{transcript}
-
 List the key insights:"""
     },
     "clean_transcript": {
         "name": "Clean Transcript",
-        "prompt": """Clean this transcript by removing filler words (um, uh, like, you know, etc.), false starts, repetitions, and verbal tics while preserving the original meaning and flow of conversation.
-
-Original transcript:
+        "prompt": """Transcript:
 {transcript}
 
+---
+
+Clean this transcript by removing filler words (um, uh, like, you know, etc.), false starts, repetitions, and verbal tics while preserving the original meaning and flow of conversation.
+
 Cleaned transcript:"""
     },
     "proper_notes": {
         "name": "Proper Notes",
-        "prompt": """Create comprehensive, well-organized notes from this transcript. Include:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create comprehensive, well-organized notes from this transcript. Include:
 - Main headings and subheadings
 - Bullet points for key information
 - Important definitions or concepts
 - Notable examples or case studies
 
-Transcript:
-{transcript}
-
 Organized notes:"""
     },
     
     # Basic Content
     "micro_summary": {
         "name": "Micro Summary",
-        "prompt": """Create a very brief 2-3 sentence summary of this transcript capturing only the most essential point.
-
-Transcript:
+        "prompt": """Transcript:
 {transcript}
 
+---
+
+Create a very brief 2-3 sentence summary of this transcript capturing only the most essential point.
+
 Micro summary:"""
     },
     "short_summary": {
         "name": "Short Summary",
-        "prompt": """Create a short paragraph summary (4-6 sentences) of this transcript highlighting the main topic and key points.
-
-Transcript:
+        "prompt": """Transcript:
 {transcript}
 
+---
+
+Create a short paragraph summary (4-6 sentences) of this transcript highlighting the main topic and key points.
+
 Short summary:"""
     },
     "bullet_points": {
         "name": "Bullet Points",
-        "prompt": """Convert this transcript into clear, concise bullet points. Each bullet should capture one distinct idea or piece of information.
-
-Transcript:
+        "prompt": """Transcript:
 {transcript}
 
+---
+
+Convert this transcript into clear, concise bullet points. Each bullet should capture one distinct idea or piece of information.
+
 Bullet points:"""
     },
     "notable_quotes": {
         "name": "Notable Quotes",
-        "prompt": """Extract the most notable, impactful, or memorable quotes from this transcript. Include quotes that are:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Extract the most notable, impactful, or memorable quotes from this transcript. Include quotes that are:
 - Insightful or thought-provoking
 - Memorable or quotable
 - Key statements that represent main ideas
 
-Transcript:
-{transcript}
-
 Notable quotes:"""
     },
     
     # Analysis
     "extract_ideas": {
         "name": "Extract Ideas",
-        "prompt": """Extract all distinct ideas mentioned in this transcript. Categorize them by:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Extract all distinct ideas mentioned in this transcript. Categorize them by:
 - Main ideas
 - Supporting ideas
 - Novel or unique ideas
 - Ideas for further exploration
 
-Transcript:
-{transcript}
-
 Extracted ideas:"""
     },
     "extract_insights": {
         "name": "Extract Insights",
-        "prompt": """Identify and explain the deeper insights from this transcript. Look for:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Identify and explain the deeper insights from this transcript. Look for:
 - Hidden meanings or implications
 - Connections between concepts
 - Lessons learned
 - Strategic insights
 
-Transcript:
-{transcript}
-
 Deep insights:"""
     },
     "extract_patterns": {
         "name": "Extract Patterns",
-        "prompt": """Identify recurring patterns, themes, and structures in this transcript:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Identify recurring patterns, themes, and structures in this transcript:
 - Repeated concepts or ideas
 - Common threads
 - Structural patterns in arguments
 - Recurring examples or references
 
-Transcript:
-{transcript}
-
 Patterns identified:"""
     },
     "extract_wisdom": {
         "name": "Extract Wisdom",
-        "prompt": """Extract timeless wisdom and life lessons from this transcript. Focus on:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Extract timeless wisdom and life lessons from this transcript. Focus on:
 - Universal truths
 - Practical wisdom
 - Life advice
 - Principles that can be applied broadly
 
-Transcript:
-{transcript}
-
 Wisdom extracted:"""
     },
     
     # Study & Education
     "flashcards": {
         "name": "Flashcards",
-        "prompt": """Create study flashcards from this transcript. Format each as:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create study flashcards from this transcript. Format each as:
 Q: [Question]
 A: [Answer]
 
 Create 10-15 flashcards covering the main concepts, definitions, and key facts.
 
-Transcript:
-{transcript}
-
 Flashcards:"""
     },
     "concept_map": {
         "name": "Concept Map",
-        "prompt": """Create a text-based concept map showing the relationships between ideas in this transcript. Use this format:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create a text-based concept map showing the relationships between ideas in this transcript. Use this format:
 [Main Concept]
 ├── [Related Concept 1]
 │   ├── [Sub-concept]
@@ -232,41 +395,47 @@ Flashcards:"""
 ├── [Related Concept 2]
 └── [Related Concept 3]
 
-Transcript:
-{transcript}
-
 Concept map:"""
     },
     "qa": {
         "name": "Q&A",
-        "prompt": """Generate comprehensive Q&A pairs based on this transcript. Include:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Generate comprehensive Q&A pairs based on this transcript. Include:
 - Factual questions
 - Conceptual questions
 - Application questions
 - Analysis questions
 
-Transcript:
-{transcript}
-
 Q&A pairs:"""
     },
     "outline_notes": {
         "name": "Outline Notes",
-        "prompt": """Create a structured outline of this transcript using Roman numerals, letters, and numbers:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create a structured outline of this transcript using Roman numerals, letters, and numbers:
 I. Main Topic
    A. Subtopic
       1. Detail
       2. Detail
    B. Subtopic
 
-Transcript:
-{transcript}
-
 Outline:"""
     },
     "cornell_notes": {
         "name": "Cornell Notes",
-        "prompt": """Format this transcript into Cornell Notes style:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Format this transcript into Cornell Notes style:
 
 CUES/QUESTIONS | NOTES
 ----------------|-------
@@ -275,66 +444,76 @@ CUES/QUESTIONS | NOTES
 SUMMARY:
 [Brief summary of main points]
 
-Transcript:
-{transcript}
-
 Cornell Notes:"""
     },
     "rapid_logging": {
         "name": "Rapid Logging",
-        "prompt": """Convert this transcript into rapid logging (bullet journal) format using:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Convert this transcript into rapid logging (bullet journal) format using:
 • Tasks/Actions
 - Notes/Facts
 ○ Events
 * Important points
 
-Transcript:
-{transcript}
-
 Rapid log:"""
     },
     "t_note_method": {
         "name": "T-Note Method",
-        "prompt": """Create T-Notes from this transcript:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create T-Notes from this transcript:
 
 MAIN IDEAS          | DETAILS
 --------------------|--------------------
 [Key concept 1]     | [Supporting details]
 [Key concept 2]     | [Supporting details]
 
-Transcript:
-{transcript}
-
 T-Notes:"""
     },
     "charting_method": {
         "name": "Charting Method",
-        "prompt": """Create a chart/table organizing information from this transcript:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create a chart/table organizing information from this transcript:
 
 | Category | Key Point | Details | Examples |
 |----------|-----------|---------|----------|
 
-Transcript:
-{transcript}
-
 Chart:"""
     },
     "qec_method": {
         "name": "QEC Method",
-        "prompt": """Apply the QEC (Question, Evidence, Conclusion) method to this transcript:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Apply the QEC (Question, Evidence, Conclusion) method to this transcript:
 
 QUESTION: What is being discussed?
 EVIDENCE: What facts/examples support it?
 CONCLUSION: What can we conclude?
 
-Transcript:
-{transcript}
-
 QEC Analysis:"""
     },
     "qa_split_page": {
         "name": "Q&A Split Page",
-        "prompt": """Create a split-page Q&A study format:
+        "prompt": """Transcript:
+{transcript}
+
+---
+
+Create a split-page Q&A study format:
 
 LEFT SIDE (Questions)     | RIGHT SIDE (Answers)
 --------------------------|------------------------
@@ -343,61 +522,151 @@ LEFT SIDE (Questions)     | RIGHT SIDE (Answers)
 
 Generate 10-15 questions covering the main content.
 
-Transcript:
-{transcript}
-
 Split-page Q&A:"""
     }
 }
 
 
-def load_saved_podcasts():
-    """Load previously saved podcasts from disk on startup"""
-    transcripts_folder = Path(__file__).parent / 'transcripts'
-    downloads_folder = Path(__file__).parent / 'downloads'
+# AI features by category as listed in the UI; the response is constant, so
+# it is serialized once
+AI_FEATURE_CATEGORIES = {
+    'popular': [
+        {'id': 'summary', 'name': 'Summary', 'description': 'Comprehensive overview'},
+        {'id': 'key_insights', 'name': 'Key Insights', 'description': 'Main takeaways'},
+        {'id': 'clean_transcript', 'name': 'Clean Transcript', 'description': 'Remove filler words'},
+        {'id': 'proper_notes', 'name': 'Proper Notes', 'description': 'Comprehensive notes'}
+    ],
+    'basic_content': [
+        {'id': 'clean_transcript', 'name': 'Clean Transcript', 'description': 'Remove filler words'},
+        {'id': 'micro_summary', 'name': 'Micro Summary', 'description': '2-3 sentences'},
+        {'id': 'short_summary', 'name': 'Short Summary', 'description': 'Brief paragraph'},
+        {'id': 'bullet_points', 'name': 'Bullet Points', 'description': 'Key points as bullets'},
+        {'id': 'summary', 'name': 'Summary', 'description': 'Full summary'},
+        {'id': 'key_insights', 'name': 'Key Insights', 'description': 'Main takeaways'},
+        {'id': 'notable_quotes', 'name': 'Notable Quotes', 'description': 'Memorable quotes'}
+    ],
+    'analysis': [
+        {'id': 'extract_ideas', 'name': 'Extract Ideas', 'description': 'All distinct ideas'},
+        {'id': 'extract_insights', 'name': 'Extract Insights', 'description': 'Deeper insights'},
+        {'id': 'extract_patterns', 'name': 'Extract Patterns', 'description': 'Recurring themes'},
+        {'id': 'extract_wisdom', 'name': 'Extract Wisdom', 'description': 'Life lessons'}
+    ],
+    'study_education': [
+        {'id': 'flashcards', 'name': 'Flashcards', 'description': 'Study cards'},
+        {'id': 'concept_map', 'name': 'Concept Map', 'description': 'Visual relationships'},
+        {'id': 'qa', 'name': 'Q&A', 'description': 'Questions and answers'},
+        {'id': 'outline_notes', 'name': 'Outline Notes', 'description': 'Structured outline'},
+        {'id': 'cornell_notes', 'name': 'Cornell Notes', 'description': 'Cornell format'},
+        {'id': 'rapid_logging', 'name': 'Rapid Logging', 'description': 'Bullet journal style'},
+        {'id': 't_note_method', 'name': 'T-Note Method', 'description': 'Two-column notes'},
+        {'id': 'charting_method', 'name': 'Charting Method', 'description': 'Table format'},
+        {'id': 'qec_method', 'name': 'QEC Method', 'description': 'Question-Evidence-Conclusion'},
+        {'id': 'qa_split_page', 'name': 'Q&A Split Page', 'description': 'Side-by-side Q&A'}
+    ]
+}
+AI_FEATURES_JSON = orjson.dumps({'features': AI_FEATURE_CATEGORIES})
+
+
+def get_transcript_path(podcast_id: str, compressed: bool = True) -> Path:
+    """Get the path of a podcast's transcript file"""
+    suffix = '.json.zst' if compressed else '.json'
+    return app.config['TRANSCRIPTS_FOLDER'] / f'{podcast_id}_transcript{suffix}'
+
+
+def find_transcript_file(podcast_id: str):
+    """Get a podcast's transcript file, falling back to the uncompressed format"""
+    for compressed in (True, False):
+        transcript_path = get_transcript_path(podcast_id, compressed)
+        if transcript_path.exists():
+            return transcript_path
+    return None
+
+
+def read_transcript_file(transcript_path: Path) -> dict:
+    """Read a transcript file, compressed or not"""
+    data = transcript_path.read_bytes()
+    if transcript_path.suffix == '.zst':
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return orjson.loads(data)
+
+
+def save_transcript_file(podcast_id: str, data: dict):
+    """Write a podcast's transcript file, compressed with zstd"""
+    compressed = zstandard.ZstdCompressor(level=TRANSCRIPT_COMPRESSION_LEVEL).compress(orjson.dumps(data))
+    with open(get_transcript_path(podcast_id), 'wb', buffering=FILE_BUFFER_SIZE) as f:
+        f.write(compressed)
+    # Replace a file saved before transcripts were compressed
+    get_transcript_path(podcast_id, compressed=False).unlink(missing_ok=True)
+
+
+def import_saved_podcasts():
+    """Add podcasts from transcript files that aren't in the database yet
     
-    if not transcripts_folder.exists():
+    Transcript files written before podcasts were stored in the database are
+    imported once; files for known podcasts are not read.
+    """
+    transcripts_folder = app.config['TRANSCRIPTS_FOLDER']
+    downloads_folder = app.config['UPLOAD_FOLDER']
+    
+    known_ids = set(db.session.scalars(select(Podcast.id)))
+    new_files = [
+        transcript_file for transcript_file in transcripts_folder.glob('*_transcript.json*')
+        if transcript_file.name.rsplit('_transcript.json', 1)[0] not in known_ids
+    ]
+    if not new_files:
         return
     
-    for transcript_file in transcripts_folder.glob('*_transcript.json'):
+    indexed_ids = get_indexed_podcast_ids()
+    
+    # Index audio files by podcast id with a single directory scan
+    audio_index = {}
+    for audio_file in downloads_folder.glob('*_*.wav'):
+        audio_index.setdefault(audio_file.name.split('_', 1)[0], audio_file)
+    
+    for transcript_file in new_files:
         try:
-            with open(transcript_file, 'r') as f:
-                data = json.load(f)
+            data = read_transcript_file(transcript_file)
             
             podcast_id = data.get('id')
-            if not podcast_id or podcast_id in podcasts_db:
+            if not podcast_id or podcast_id in known_ids:
                 continue
             
             # Find the audio file
-            audio_files = list(downloads_folder.glob(f'{podcast_id}_*.wav'))
-            file_path = str(audio_files[0]) if audio_files else None
-            filename = audio_files[0].name if audio_files else None
+            audio_file = audio_index.get(podcast_id)
             
             # Get file size for display
-            file_size = None
-            if file_path and os.path.exists(file_path):
-                file_size = os.path.getsize(file_path)
+            file_size = data.get('file_size')
+            if file_size is None and audio_file:
+                file_size = audio_file.stat().st_size
             
-            # Reconstruct the podcast entry
             transcript = data.get('transcript', '')
-            podcasts_db[podcast_id] = {
-                'id': podcast_id,
-                'user_id': data.get('user_id'),
-                'title': data.get('title', 'Unknown'),
-                'duration': data.get('duration', 0),
-                'file_path': file_path,
-                'filename': filename,
-                'file_size': file_size,
-                'status': 'transcribed' if transcript else 'downloaded',
-                'transcript': transcript,
-                'chunks': chunk_transcript(transcript) if transcript else None,
-                'utterances': data.get('utterances', []),
-                'words': data.get('words', []),
-                'saved_at': os.path.getmtime(transcript_file)
-            }
-            logger.info(f"Loaded saved podcast: {data.get('title', podcast_id)}")
+            if podcast_id not in indexed_ids:
+                # Transcript saved before search indexing existed
+                index_transcript_chunks(podcast_id, data.get('chunks') or chunk_transcript(transcript))
+            if 'word_count' in data:
+                stats = {'word_count': data['word_count'], 'transcript_preview_200': data.get('transcript_preview_200')}
+            else:
+                # Transcript saved before stats were persisted
+                stats = get_transcript_stats(transcript)
+            
+            db.session.add(Podcast(
+                id=podcast_id,
+                user_id=data.get('user_id'),
+                title=data.get('title', 'Unknown'),
+                duration=data.get('duration', 0),
+                status='transcribed' if transcript else 'downloaded',
+                file_path=str(audio_file) if audio_file else None,
+                filename=audio_file.name if audio_file else None,
+                file_size=file_size,
+                saved_at=os.path.getmtime(transcript_file),
+                **stats
+            ))
+            db.session.commit()
+            known_ids.add(podcast_id)
+            logger.info(f"Imported saved podcast: {data.get('title', podcast_id)}")
         except Exception as e:
-            logger.error(f"Error loading {transcript_file}: {e}")
+            db.session.rollback()
+            logger.error(f"Error importing {transcript_file}: {e}")
 
 
 def download_youtube_audio(url: str, output_path: Path) -> dict:
@@ -406,17 +675,31 @@ def download_youtube_audio(url: str, output_path: Path) -> dict:
     output_template = str(output_path / f'{unique_id}_%(title)s.%(ext)s')
     
     ydl_opts = {
-        'format': 'bestaudio/best',
+        'format': 'bestaudio[ext=m4a]/bestaudio/best',
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
             'preferredcodec': 'wav',
-            'preferredquality': '192',
+            'preferredquality': '0',
         }],
+        # Write 16kHz mono directly, the format the STT API is sent, so the
+        # WAV is small and transcription does not have to resample it
+        'postprocessor_args': {
+            'extractaudio+ffmpeg_o': ['-ac', '1', '-ar', str(STT_SAMPLE_RATE)],
+        },
         'outtmpl': output_template,
+        'noplaylist': True,
+        'concurrent_fragment_downloads': 8,  # Fetch DASH fragments in parallel
+        'buffersize': FILE_BUFFER_SIZE,
+        'http_chunk_size': 10 * 1024 * 1024,  # 10MB HTTP range requests
         'quiet': True,
         'no_warnings': True,
     }
     
+    # Use aria2c's multi-connection downloads when it is installed
+    if shutil.which('aria2c'):
+        ydl_opts['external_downloader'] = {'default': 'aria2c'}
+        ydl_opts['external_downloader_args'] = {'aria2c': ['-x16', '-s16', '-k1M']}
+    
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=True)
         title = info.get('title', 'Unknown')
@@ -435,6 +718,19 @@ def download_youtube_audio(url: str, output_path: Path) -> dict:
     raise Exception("Failed to download audio")
 
 
+def get_audio_duration(file_path: str) -> float:
+    """Get audio duration in seconds using ffprobe"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+         '-of', 'default=noprint_wrappers=1:nokey=1', file_path],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"Failed to read audio duration: {result.stderr.strip()}")
+    return float(result.stdout.strip())
+
+
 def transcribe_audio(file_path: str, language: str = "en") -> dict:
     """Transcribe audio using Smallest AI Pulse API, handling large files by chunking
     
@@ -444,118 +740,109 @@ def transcribe_audio(file_path: str, language: str = "en") -> dict:
     - 10-30 min: 5-minute chunks
     - 30-60 min: 7-minute chunks
     - > 60 min: 5-minute chunks (more chunks but reliable)
+    
+    Compression happens in a single ffmpeg pass whose output is chunked in
+    memory, so no intermediate audio files are written.
     """
     if not SMALLEST_API_KEY:
         raise ValueError("SMALLEST_API_KEY environment variable not set")
     
-    from pydub import AudioSegment
-    import tempfile
-    
-    # Load audio file
-    audio = AudioSegment.from_wav(file_path)
-    duration_s = len(audio) / 1000  # Duration in seconds
-    duration_ms = len(audio)
-    
-    # Compress audio: convert to mono 16kHz for smaller file size
-    # This is key to avoiding "Audio data too large" errors
-    audio = audio.set_channels(1).set_frame_rate(16000)
-    logger.info(f"Compressed audio to mono 16kHz")
+    duration_s = get_audio_duration(file_path)
     
     # Dynamically determine chunk size based on total duration
     if duration_s <= 180:  # < 3 minutes
-        max_chunk_ms = duration_ms  # No chunking needed
+        max_chunk_s = int(duration_s) + 1  # No chunking needed
         logger.info(f"Short audio ({duration_s:.1f}s) - single chunk")
     elif duration_s <= 600:  # 3-10 minutes
-        max_chunk_ms = 3 * 60 * 1000  # 3-minute chunks
+        max_chunk_s = 3 * 60  # 3-minute chunks
         logger.info(f"Medium audio ({duration_s:.1f}s) - using 3-minute chunks")
     elif duration_s <= 1800:  # 10-30 minutes
-        max_chunk_ms = 5 * 60 * 1000  # 5-minute chunks
+        max_chunk_s = 5 * 60  # 5-minute chunks
         logger.info(f"Long audio ({duration_s:.1f}s) - using 5-minute chunks")
     elif duration_s <= 3600:  # 30-60 minutes
-        max_chunk_ms = 7 * 60 * 1000  # 7-minute chunks
+        max_chunk_s = 7 * 60  # 7-minute chunks
         logger.info(f"Very long audio ({duration_s:.1f}s) - using 7-minute chunks")
     else:  # > 60 minutes
-        max_chunk_ms = 5 * 60 * 1000  # 5-minute chunks (more reliable for very long)
+        max_chunk_s = 5 * 60  # 5-minute chunks (more reliable for very long)
         logger.info(f"Extra long audio ({duration_s:.1f}s) - using 5-minute chunks")
     
-    if duration_ms <= max_chunk_ms:
-        # Small file, transcribe directly
-        logger.info(f"Transcribing single chunk ({duration_s:.1f}s)")
-        
-        # Save compressed audio to temp file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-            audio.export(tmp.name, format='wav')
-            tmp_path = tmp.name
-        
-        try:
-            return transcribe_chunk(tmp_path, language)
-        finally:
-            try:
-                os.remove(tmp_path)
-            except:
-                pass
-    
-    # Large file, split into chunks
-    num_chunks = int(duration_ms / max_chunk_ms) + 1
-    logger.info(f"Audio is {duration_s:.1f}s, splitting into ~{num_chunks} chunks...")
-    
-    chunks = []
-    start = 0
-    chunk_num = 0
-    
-    while start < duration_ms:
-        end = min(start + max_chunk_ms, duration_ms)
-        chunk = audio[start:end]
-        chunks.append(chunk)
-        start = end
-        chunk_num += 1
-    
-    logger.info(f"Split into {len(chunks)} chunks")
+    # Compress to mono 16kHz in a single ffmpeg pass, streaming raw PCM
+    # This is key to avoiding "Audio data too large" errors
+    # Errors go to a temp file: damaged audio can log more than a pipe buffer
+    # holds, which would block ffmpeg while we wait on stdout
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        ['ffmpeg', '-v', 'error', '-i', file_path,
+         '-ac', '1', '-ar', str(STT_SAMPLE_RATE), '-f', 's16le', '-'],
+        stdout=subprocess.PIPE,
+        stderr=stderr_file
+    )
+    chunk_bytes = max_chunk_s * STT_SAMPLE_RATE * 2  # 16-bit samples
+    
+    # Cut the stream into chunks and transcribe them in parallel (network-bound,
+    # so threads are fine). Each chunk's offset into the full audio is recorded
+    # so the results can be stitched in order. Only a few chunks are held in
+    # memory at once: reading pauses while every worker is busy, and stops as
+    # soon as a chunk fails.
+    futures = []
+    time_offsets = []
+    time_offset = 0
     
-    # Transcribe each chunk
+    try:
+        with ThreadPoolExecutor(max_workers=TRANSCRIBE_MAX_WORKERS) as executor:
+            while True:
+                pending = [f for f in futures if not f.done()]
+                if len(pending) >= TRANSCRIBE_MAX_WORKERS:
+                    wait(pending, return_when=FIRST_COMPLETED)
+                if any(f.done() and f.exception() for f in futures):
+                    executor.shutdown(cancel_futures=True)
+                    break
+                
+                pcm = process.stdout.read(chunk_bytes)
+                if not pcm:
+                    break
+                
+                time_offsets.append(time_offset)
+                time_offset += len(pcm) / (STT_SAMPLE_RATE * 2)
+                logger.info(f"Transcribing chunk {len(futures) + 1} ({time_offsets[-1]:.0f}s-{time_offset:.0f}s)...")
+                futures.append(executor.submit(transcribe_chunk, pcm_to_wav(pcm), language))
+            
+            results = [future.result() for future in futures]
+    finally:
+        process.stdout.close()
+        process.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors='replace')
+        stderr_file.close()
+    
+    if process.returncode != 0:
+        raise Exception(f"Audio conversion failed: {stderr.strip()}")
+    if not futures:
+        raise Exception("Audio conversion produced no output")
+    
+    # Stitch results together in chunk order
     all_transcriptions = []
     all_words = []
     all_utterances = []
-    time_offset = 0
     
-    for i, chunk in enumerate(chunks):
-        logger.info(f"Transcribing chunk {i+1}/{len(chunks)}...")
+    for result, time_offset in zip(results, time_offsets):
+        # Add transcription
+        if result.get('transcription'):
+            all_transcriptions.append(result['transcription'])
         
-        # Save chunk to temp file (already compressed)
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-            chunk.export(tmp.name, format='wav')
-            tmp_path = tmp.name
+        # Adjust word timestamps
+        if result.get('words'):
+            for word in result['words']:
+                word['start'] = word.get('start', 0) + time_offset
+                word['end'] = word.get('end', 0) + time_offset
+                all_words.append(word)
         
-        try:
-            result = transcribe_chunk(tmp_path, language)
-            
-            # Add transcription
-            if result.get('transcription'):
-                all_transcriptions.append(result['transcription'])
-            
-            # Adjust word timestamps
-            if result.get('words'):
-                for word in result['words']:
-                    word['start'] = word.get('start', 0) + time_offset
-                    word['end'] = word.get('end', 0) + time_offset
-                    all_words.append(word)
-            
-            # Adjust utterance timestamps
-            if result.get('utterances'):
-                for utt in result['utterances']:
-                    utt['start'] = utt.get('start', 0) + time_offset
-                    utt['end'] = utt.get('end', 0) + time_offset
-                    all_utterances.append(utt)
-            
-            # Update time offset for next chunk
-            time_offset += len(chunk) / 1000  # Convert ms to seconds
-            
-        finally:
-            # Clean up temp file
-            try:
-                os.remove(tmp_path)
-            except:
-                pass
+        # Adjust utterance timestamps
+        if result.get('utterances'):
+            for utt in result['utterances']:
+                utt['start'] = utt.get('start', 0) + time_offset
+                utt['end'] = utt.get('end', 0) + time_offset
+                all_utterances.append(utt)
     
     return {
         'status': 'success',
@@ -565,10 +852,30 @@ def transcribe_audio(file_path: str, language: str = "en") -> dict:
     }
 
 
-def transcribe_chunk(file_path: str, language: str = "en") -> dict:
-    """Transcribe a single audio chunk using Smallest AI Pulse API"""
-    with open(file_path, 'rb') as audio_file:
-        response = requests.post(
+def pcm_to_wav(pcm: bytes) -> io.BytesIO:
+    """Wrap raw 16-bit mono PCM at the STT sample rate in an in-memory WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(STT_SAMPLE_RATE)
+        wav.writeframes(pcm)
+    buffer.seek(0)
+    return buffer
+
+
+def transcribe_chunk(audio_file, language: str = "en") -> dict:
+    """Transcribe a single audio chunk using Smallest AI Pulse API
+    
+    Accepts a path to a WAV file or a readable file-like object.
+    """
+    if isinstance(audio_file, (str, Path)):
+        with open(audio_file, 'rb') as f:
+            return transcribe_chunk(f, language)
+    
+    with transcribe_semaphore:
+        # Pass the file object so the body is streamed instead of copied
+        response = smallest_session.post(
             SMALLEST_API_URL,
             params={
                 "model": "pulse",
@@ -580,7 +887,7 @@ def transcribe_chunk(file_path: str, language: str = "en") -> dict:
                 "Authorization": f"Bearer {SMALLEST_API_KEY}",
                 "Content-Type": "audio/wav",
             },
-            data=audio_file.read(),
+            data=audio_file,
             timeout=300  # 5 minutes timeout
         )
     
@@ -591,40 +898,35 @@ def transcribe_chunk(file_path: str, language: str = "en") -> dict:
 
 
 def chunk_transcript(transcript: str, chunk_size: int = 1000) -> list:
-    """Split transcript into chunks for better context retrieval"""
-    words = transcript.split()
-    chunks = []
-    current_chunk = []
-    current_length = 0
+    """Split transcript into chunks for better context retrieval
     
-    for word in words:
-        current_chunk.append(word)
-        current_length += len(word) + 1
-        
-        if current_length >= chunk_size:
-            chunks.append(' '.join(current_chunk))
-            current_chunk = []
-            current_length = 0
+    Each word counts its length plus a separator; a chunk ends at the first
+    word that brings it to chunk_size. With whitespace normalized to single
+    spaces that word is simply the one ending at the next space, so chunk
+    boundaries are found with str.find instead of a per-word loop.
+    """
+    text = ' '.join(transcript.split())
+    chunks = []
+    start = 0
     
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
+    while start < len(text):
+        end = text.find(' ', start + chunk_size - 1)
+        if end == -1:
+            end = len(text)
+        chunks.append(text[start:end])
+        start = end + 1
     
     return chunks
 
 
-def find_relevant_context(query: str, chunks: list, top_k: int = 3) -> str:
-    """Find relevant chunks based on keyword matching (simple approach)"""
-    query_words = set(query.lower().split())
-    scored_chunks = []
-    
-    for chunk in chunks:
-        chunk_words = set(chunk.lower().split())
-        score = len(query_words & chunk_words)
-        scored_chunks.append((score, chunk))
-    
-    # Sort by score and get top chunks
-    scored_chunks.sort(key=lambda x: x[0], reverse=True)
-    relevant = [chunk for score, chunk in scored_chunks[:top_k] if score > 0]
+def tokenize(text: str) -> list:
+    """Lowercase a text and split it into word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def find_relevant_context(query: str, podcast_id: str, chunks: list, top_k: int = 3) -> str:
+    """Find relevant chunks using the SQLite FTS5 index (BM25 ranking)"""
+    relevant = search_transcript_chunks(podcast_id, sorted(set(tokenize(query))), top_k)
     
     if not relevant:
         # Return first few chunks as fallback
@@ -633,76 +935,339 @@ def find_relevant_context(query: str, chunks: list, top_k: int = 3) -> str:
     return '\n\n'.join(relevant)
 
 
-def generate_chat_response(query: str, context: str, transcript: str, podcast_title: str = "the podcast") -> str:
-    """Generate a response using Ollama (local LLM) based on the transcript context"""
+def stream_chat_response(query: str, context: str, transcript: str, podcast_title: str = "the podcast"):
+    """Stream a response from Ollama (local LLM) based on the transcript context
+    
+    Yields text fragments as the model generates them.
+    """
     
     # Create a prompt for Ollama
-    prompt = f"""You are a helpful assistant that answers questions about a podcast called "{podcast_title}". 
+    # The per-podcast parts come first and the per-question parts last, so
+    # Ollama can reuse the cached prompt prefix across questions
+    prompt = f"""Here is an excerpt from the transcript of a podcast called "{podcast_title}":
+---
+{transcript[:3000] if len(transcript) > 3000 else transcript}
+---
+
+You are a helpful assistant that answers questions about this podcast.
 You have access to the transcript and should answer questions based ONLY on the information from the podcast.
 If the answer is not in the transcript, say so. Be conversational and helpful, as if you're discussing the podcast with a friend.
 Keep your response concise but informative.
 
-Here is the relevant section of the transcript:
+Here is the section of the transcript most relevant to the question:
 ---
 {context}
 ---
 
-For additional context, here's a broader excerpt from the transcript:
----
-{transcript[:3000] if len(transcript) > 3000 else transcript}
----
-
 User's question: {query}
 
 Answer:"""
     
+    yield from stream_ollama_response(prompt, num_predict=1000, timeout=120)
+
+
+def stream_ollama_response(prompt: str, num_predict: int, timeout: int):
+    """Stream a completion for a prompt from Ollama
+    
+    Yields text fragments as the model generates them.
+    """
     try:
-        response = requests.post(
+        response = ollama_session.post(
             OLLAMA_URL,
             json={
                 "model": OLLAMA_MODEL,
                 "prompt": prompt,
-                "stream": False,
+                "stream": True,
                 "options": {
                     "temperature": 0.7,
-                    "num_predict": 1000
+                    "num_predict": num_predict,
+                    "num_ctx": OLLAMA_NUM_CTX
                 }
             },
-            timeout=120
+            stream=True,
+            timeout=timeout
         )
-        
+    except requests.exceptions.ConnectionError:
+        raise Exception("Cannot connect to Ollama. Make sure Ollama is running (run 'ollama serve' in terminal).")
+    
+    with response:
         if response.status_code != 200:
-            return f"Error: Ollama returned status {response.status_code}. Make sure Ollama is running (ollama serve)."
+            raise Exception(f"Ollama returned status {response.status_code}. Make sure Ollama is running (ollama serve).")
         
-        result = response.json()
-        return result.get('response', 'No response generated')
-    except requests.exceptions.ConnectionError:
-        return "Error: Cannot connect to Ollama. Make sure Ollama is running (run 'ollama serve' in terminal)."
-    except Exception as e:
-        return f"Error generating response: {str(e)}"
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = orjson.loads(line)
+            if result.get('error'):
+                raise Exception(result['error'])
+            if result.get('response'):
+                yield result['response']
+            if result.get('done'):
+                break
 
 
-def check_ollama_status():
-    """Check if Ollama is running and model is available"""
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            model_names = [m.get('name', '').split(':')[0] for m in models]
-            return {
-                'running': True,
-                'model_available': 'llama3.2' in model_names or any('llama3.2' in n for n in model_names),
-                'models': model_names
+def sse_event(data: dict) -> str:
+    """Format a dict as a Server-Sent Events message"""
+    return f"data: {orjson.dumps(data).decode()}\n\n"
+
+
+def get_feature_prompt(podcast: dict, feature_type: str) -> str:
+    """Get the prompt for an AI feature on a podcast, built once per transcript
+    
+    Prompts are cached in the podcast's prompt_cache, which is reset whenever
+    the podcast is transcribed again.
+    """
+    prompt_cache = podcast.setdefault('prompt_cache', {})
+    prompt = prompt_cache.get(feature_type)
+    
+    if prompt is None:
+        # Prepare the transcript (truncate if too long for context)
+        transcript = podcast['transcript']
+        max_transcript_tokens = OLLAMA_NUM_CTX - AI_FEATURE_NUM_PREDICT - AI_FEATURE_PROMPT_OVERHEAD
+        max_transcript_length = max_transcript_tokens * CHARS_PER_TOKEN
+        if len(transcript) > max_transcript_length:
+            transcript = transcript[:max_transcript_length] + "\n\n[Transcript truncated for processing...]"
+        
+        # Build the prompt
+        prompt = AI_FEATURE_PROMPTS[feature_type]['prompt'].replace('{transcript}', transcript)
+        prompt_cache[feature_type] = prompt
+    
+    return prompt
+
+
+def generate_ai_feature(prompt: str) -> str:
+    """Generate an AI feature result for a prompt using Ollama"""
+    # Call Ollama
+    response = ollama_session.post(
+        OLLAMA_URL,
+        json={
+            "model": OLLAMA_MODEL,
+            "prompt": prompt,
+            "stream": False,
+            "options": {
+                "temperature": 0.7,
+                "num_predict": AI_FEATURE_NUM_PREDICT,
+                "num_ctx": OLLAMA_NUM_CTX
             }
-    except:
-        pass
-    return {'running': False, 'model_available': False, 'models': []}
+        },
+        timeout=180  # 3 minutes timeout for longer features
+    )
+    
+    if response.status_code != 200:
+        raise Exception(f'Ollama returned status {response.status_code}. Make sure Ollama is running.')
+    
+    result = response.json()
+    return result.get('response', 'No response generated')
+
+
+def get_ai_feature_cache_path(podcast: dict, prompt: str) -> Path:
+    """Get the cache file for an AI feature result
+    
+    Files are named by podcast id and a hash of the model and full prompt, so a
+    new transcript, prompt template or model never reuses a stale result.
+    """
+    key = hashlib.sha256(f"{OLLAMA_MODEL}|{prompt}".encode()).hexdigest()
+    return AI_CACHE_FOLDER / f"{podcast['id']}_{key}.json"
+
+
+def get_ai_feature_result(podcast: dict, feature_type: str) -> tuple:
+    """Get an AI feature result for a podcast, from the cache if available
+    
+    Results are cached in memory and on disk, so they survive restarts.
+    Returns a (result, cached) tuple.
+    """
+    prompt = get_feature_prompt(podcast, feature_type)
+    cache_path = get_ai_feature_cache_path(podcast, prompt)
+    
+    cached_result = load_ai_feature_result(cache_path)
+    if cached_result is not None:
+        return cached_result, True
+    
+    result = generate_ai_feature(prompt)
+    save_ai_feature_result(cache_path, feature_type, result)
+    
+    return result, False
+
+
+def load_ai_feature_result(cache_path: Path):
+    """Load a cached AI feature result from memory or disk, or None if missing"""
+    cached_result = ai_feature_cache.get(cache_path.name)
+    if cached_result is None and cache_path.exists():
+        cached_result = orjson.loads(cache_path.read_bytes())['result']
+        remember_ai_feature_result(cache_path.name, cached_result)
+    return cached_result
+
+
+def save_ai_feature_result(cache_path: Path, feature_type: str, result: str):
+    """Cache an AI feature result in memory and on disk"""
+    # Write atomically so a concurrent reader never sees a partial file
+    tmp_path = cache_path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+    tmp_path.write_bytes(orjson.dumps({'feature': feature_type, 'model': OLLAMA_MODEL, 'result': result}))
+    os.replace(tmp_path, cache_path)
+    remember_ai_feature_result(cache_path.name, result)
+
+
+def remember_ai_feature_result(key: str, result: str):
+    """Keep an AI feature result in memory, evicting the oldest beyond the cap"""
+    with ai_feature_cache_lock:
+        ai_feature_cache[key] = result
+        while len(ai_feature_cache) > AI_CACHE_MAX_ENTRIES:
+            del ai_feature_cache[next(iter(ai_feature_cache))]
+
+
+def delete_ai_feature_results(podcast_id: str):
+    """Remove all cached AI feature results for a podcast"""
+    for cache_path in AI_CACHE_FOLDER.glob(f'{podcast_id}_*.json'):
+        ai_feature_cache.pop(cache_path.name, None)
+        cache_path.unlink(missing_ok=True)
+
+
+def prefetch_ai_features(podcast_id: str):
+    """Generate the most-used AI features for a freshly transcribed podcast"""
+    with app.app_context():
+        for feature_type in PREFETCH_FEATURES:
+            # Stop if the podcast was deleted meanwhile
+            record = get_current_podcast_record(podcast_id)
+            if record is None:
+                return
+            podcast = load_podcast(record)
+            if not podcast.get('transcript'):
+                return
+            try:
+                result, cached = get_ai_feature_result(podcast, feature_type)
+                if not cached:
+                    logger.info(f"Prefetched AI feature '{feature_type}' for '{podcast['title']}'")
+            except Exception as e:
+                logger.warning(f"AI feature prefetch stopped for {podcast_id}: {str(e)}")
+                return
+
+
+def get_query_embedding(query: str):
+    """Embed a chat query with Ollama, L2-normalized for cosine similarity
+    
+    The embedding is a float32 array, a quarter the size of a list of floats
+    when cached. Returns None if the embedding model is unavailable, which disables
+    semantic matching but keeps exact-match caching.
+    """
+    try:
+        response = ollama_session.post(
+            OLLAMA_EMBED_URL,
+            json={"model": OLLAMA_EMBED_MODEL, "prompt": query},
+            timeout=10
+        )
+        if response.status_code != 200:
+            return None
+        embedding = response.json().get('embedding')
+    except Exception:
+        return None
+    
+    if not embedding:
+        return None
+    norm = math.sqrt(sum(x * x for x in embedding))
+    return array('f', (x / norm for x in embedding)) if norm else None
+
+
+def get_chat_cache_key(query: str) -> str:
+    """Hash a normalized chat query for exact-match lookups"""
+    normalized = ' '.join(tokenize(query))
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def get_cached_chat_response(podcast_id: str, key: str, embedding=None):
+    """Look up a cached chat response by exact key, then by embedding similarity if given"""
+    now = time.time()
+    with chat_cache_lock:
+        entries = [e for e in chat_cache.pop(podcast_id, []) if now - e['created_at'] < CHAT_CACHE_TTL]
+        if not entries:
+            return None
+        chat_cache[podcast_id] = entries  # Most recently used last
+        
+        for entry in entries:
+            if entry['key'] == key:
+                return entry
+        
+        if embedding:
+            best_score, best_entry = 0, None
+            for entry in entries:
+                if entry['embedding'] and len(entry['embedding']) == len(embedding):
+                    score = sum(a * b for a, b in zip(embedding, entry['embedding']))
+                    if score > best_score:
+                        best_score, best_entry = score, entry
+            if best_score >= CHAT_CACHE_SIMILARITY:
+                return best_entry
+    
+    return None
+
+
+def cache_chat_response(podcast_id: str, key: str, embedding, response: str, context: str):
+    """Store a chat response, dropping expired entries and evicting the oldest beyond the caps"""
+    now = time.time()
+    with chat_cache_lock:
+        for cached_id in list(chat_cache):
+            live = [e for e in chat_cache[cached_id] if now - e['created_at'] < CHAT_CACHE_TTL]
+            if live:
+                chat_cache[cached_id] = live
+            else:
+                del chat_cache[cached_id]
+        
+        entries = chat_cache.pop(podcast_id, [])
+        chat_cache[podcast_id] = entries  # Most recently used last
+        entries.append({
+            'key': key,
+            'embedding': embedding,
+            'response': response,
+            'context': context,
+            'created_at': now
+        })
+        del entries[:-CHAT_CACHE_MAX_ENTRIES]
+        while len(chat_cache) > CHAT_CACHE_MAX_PODCASTS:
+            del chat_cache[next(iter(chat_cache))]
+
+
+def is_model_available(model: str, model_names: list) -> bool:
+    """Check if a model is among Ollama's installed models
+    
+    Ollama resolves a model given without a tag to its :latest tag, so that is
+    the tag that must be installed; other tags of the model don't count.
+    """
+    if ':' not in model:
+        model = f'{model}:latest'
+    return model in model_names
+
+
+def check_ollama_status(max_age: float = OLLAMA_STATUS_TTL):
+    """Check if Ollama is running and model is available
+    
+    Results younger than max_age seconds are reused, so frequent status
+    polling costs a dict lookup instead of a request to Ollama.
+    """
+    with ollama_status_lock:
+        if ollama_status_cache['status'] and time.time() - ollama_status_cache['checked_at'] < max_age:
+            return ollama_status_cache['status']
+        
+        status = {'running': False, 'model_available': False, 'models': []}
+        try:
+            response = ollama_session.get("http://localhost:11434/api/tags", timeout=5)
+            if response.status_code == 200:
+                models = response.json().get('models', [])
+                model_names = [m.get('name', '') for m in models]
+                status = {
+                    'running': True,
+                    'model_available': is_model_available(OLLAMA_MODEL, model_names),
+                    'models': model_names
+                }
+        except:
+            pass
+        
+        ollama_status_cache['status'] = status
+        ollama_status_cache['checked_at'] = time.time()
+        return status
 
 
 def start_ollama():
     """Start Ollama server automatically if not running"""
     logger.info("Checking if Ollama is running...")
-    status = check_ollama_status()
+    status = check_ollama_status(max_age=0)
     
     if status['running']:
         logger.info("✓ Ollama is already running")
@@ -726,7 +1291,7 @@ def start_ollama():
         # Wait for Ollama to start (up to 10 seconds)
         for i in range(10):
             time.sleep(1)
-            status = check_ollama_status()
+            status = check_ollama_status(max_age=0)
             if status['running']:
                 logger.info("✓ Ollama started successfully")
                 if status['model_available']:
@@ -766,10 +1331,216 @@ def get_status():
     })
 
 
+def load_podcast(record: Podcast) -> dict:
+    """Get a podcast with its transcript and chunks, for chat and AI features
+    
+    The transcript is read from the transcript file the first time the podcast
+    is used and kept in memory while it stays in use. A copy that no longer
+    matches the record (e.g. transcribed since by another worker), or that was
+    loaded before the transcript file was written, is reloaded.
+    """
+    with podcasts_db_lock:
+        podcast = podcasts_db.pop(record.id, None)
+        if podcast is not None:
+            podcasts_db[record.id] = podcast  # Most recently used last
+            if podcast['status'] == record.status and podcast['saved_at'] == record.saved_at \
+                    and (podcast['transcript'] is not None or record.status != 'transcribed'):
+                return podcast
+    
+    podcast = {**record.to_dict(), 'transcript': None, 'chunks': None}
+    
+    transcript_path = find_transcript_file(record.id)
+    if record.status == 'transcribed' and transcript_path:
+        data = read_transcript_file(transcript_path)
+        if transcript_path.suffix == '.json':
+            # Compress transcripts saved before compression was added
+            save_transcript_file(record.id, data)
+        podcast['transcript'] = data.get('transcript', '')
+        # Transcripts saved before chunks were persisted are chunked here
+        podcast['chunks'] = data.get('chunks') or chunk_transcript(podcast['transcript'])
+    
+    remember_podcast(podcast)
+    return podcast
+
+
+def remember_podcast(podcast: dict):
+    """Keep a loaded podcast in memory, evicting the least recently used beyond the cap
+    
+    A copy saved more recently than the given one, or saved at the same time but
+    with its transcript loaded, is kept instead, so a request that read the
+    record before a transcription finished can't replace it.
+    """
+    with podcasts_db_lock:
+        current = podcasts_db.pop(podcast['id'], None)
+        if current is not None and (current['saved_at'] or 0, current['transcript'] is not None) > \
+                (podcast['saved_at'] or 0, podcast['transcript'] is not None):
+            podcast = current
+        podcasts_db[podcast['id']] = podcast
+        while len(podcasts_db) > PODCAST_CACHE_MAX_ENTRIES:
+            del podcasts_db[next(iter(podcasts_db))]
+
+
+def delete_transcript_data(podcast_id: str):
+    """Remove a podcast's transcript files, search index entries and cached data"""
+    for compressed in (True, False):
+        get_transcript_path(podcast_id, compressed).unlink(missing_ok=True)
+    delete_transcript_chunks(podcast_id)
+    chat_cache.pop(podcast_id, None)
+    with podcasts_db_lock:
+        podcasts_db.pop(podcast_id, None)
+
+
+def get_current_podcast_record(podcast_id: str):
+    """Get a podcast's database record as currently stored, or None if deleted"""
+    return db.session.scalar(
+        select(Podcast).where(Podcast.id == podcast_id).execution_options(populate_existing=True)
+    )
+
+
+def download_podcast(url: str, user_id: int) -> dict:
+    """Download audio from a YouTube URL and register the podcast for a user"""
+    logger.info(f"Starting download for URL: {url[:50]}...")
+    start_time = time.time()
+    
+    result = download_youtube_audio(url, app.config['UPLOAD_FOLDER'])
+    
+    # Store in database with user ownership
+    record = Podcast(
+        id=result['id'],
+        user_id=user_id,
+        title=result['title'],
+        duration=result['duration'],
+        status='downloaded',
+        file_path=result['file_path'],
+        filename=result['filename'],
+        file_size=os.path.getsize(result['file_path']),
+        saved_at=time.time()
+    )
+    db.session.add(record)
+    db.session.commit()
+    
+    elapsed = time.time() - start_time
+    logger.info(f"Download completed: '{result['title']}' ({result['duration']}s) in {elapsed:.1f}s")
+    
+    return {
+        'success': True,
+        'podcast_id': result['id'],
+        'title': result['title'],
+        'duration': result['duration'],
+        'message': 'Audio downloaded successfully'
+    }
+
+
+def get_transcript_stats(transcript: str) -> dict:
+    """Get the word count and history preview of a transcript"""
+    return {
+        'word_count': len(transcript.split()),
+        'transcript_preview_200': transcript[:200] + '...' if len(transcript) > 200 else transcript
+    }
+
+
+def transcribe_podcast(podcast_id: str, language: str = "en") -> dict:
+    """Transcribe a downloaded podcast, index it for chat and save the transcript"""
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
+        raise Exception("Podcast not found")
+    logger.info(f"Starting transcription for: '{record.title}'")
+    start_time = time.time()
+    
+    result = transcribe_audio(record.file_path, language)
+    
+    transcript = result.get('transcription', '')
+    chunks = chunk_transcript(transcript)
+    stats = get_transcript_stats(transcript)
+    
+    # Update database, unless the podcast was deleted while being transcribed
+    record = get_current_podcast_record(podcast_id)
+    if record is None:
+        raise Exception("Podcast was deleted during transcription")
+    record.status = 'transcribed'
+    record.word_count = stats['word_count']
+    record.transcript_preview_200 = stats['transcript_preview_200']
+    record.saved_at = time.time()
+    podcast = {**record.to_dict(), 'transcript': transcript, 'chunks': chunks}
+    try:
+        db.session.commit()
+    except (StaleDataError, ObjectDeletedError):
+        db.session.rollback()
+        raise Exception("Podcast was deleted during transcription")
+    
+    # Save transcript to file
+    save_transcript_file(podcast_id, {
+        'id': podcast_id,
+        'user_id': podcast['user_id'],
+        'title': podcast['title'],
+        'duration': podcast['duration'] or 0,
+        'file_size': podcast['file_size'],
+        'transcript': transcript,
+        **stats,
+        'chunks': chunks,
+        'utterances': result.get('utterances', []),
+        'words': result.get('words', [])
+    })
+    index_transcript_chunks(podcast_id, chunks)
+    chat_cache.pop(podcast_id, None)
+    
+    # delete_podcast removes the record before the files, so if it is still
+    # there now, any later delete will also remove what was just written
+    if get_current_podcast_record(podcast_id) is None:
+        delete_transcript_data(podcast_id)
+        raise Exception("Podcast was deleted during transcription")
+    remember_podcast(podcast)
+    
+    elapsed = time.time() - start_time
+    word_count = stats['word_count']
+    logger.info(f"Transcription completed: {word_count} words in {elapsed:.1f}s")
+    
+    # Warm up the features users usually open first
+    if transcript:
+        prefetch_executor.submit(prefetch_ai_features, podcast_id)
+    
+    return {
+        'success': True,
+        'transcript': transcript,
+        'word_count': word_count,
+        'message': 'Transcription completed'
+    }
+
+
+def submit_job(user_id: int, func, *args) -> str:
+    """Run a function on the background job pool and return its job id"""
+    now = time.time()
+    job_id = str(uuid.uuid4())
+    
+    # Forget finished jobs nobody polled for
+    db.session.execute(
+        delete(Job).where(Job.status != 'running', Job.created_at < now - JOB_RETENTION)
+    )
+    db.session.add(Job(id=job_id, user_id=user_id, status='running', created_at=now))
+    db.session.commit()
+    
+    job_executor.submit(run_job, job_id, func, *args)
+    return job_id
+
+
+def run_job(job_id: str, func, *args):
+    """Execute a background job inside the app context and record its outcome"""
+    with app.app_context():
+        try:
+            outcome = {'status': 'completed', 'result': func(*args)}
+        except Exception as e:
+            logger.error(f"Job {func.__name__} failed: {str(e)}")
+            db.session.rollback()
+            outcome = {'status': 'failed', 'error': str(e)}
+        
+        db.session.execute(update(Job).where(Job.id == job_id).values(**outcome))
+        db.session.commit()
+
+
 @app.route('/api/download', methods=['POST'])
 @login_required
 def download_audio():
-    """Download audio from YouTube URL"""
+    """Start downloading audio from a YouTube URL in the background"""
     data = request.get_json()
     url = data.get('url')
     
@@ -777,121 +1548,62 @@ def download_audio():
         logger.warning("Download request missing URL")
         return jsonify({'error': 'No URL provided'}), 400
     
-    logger.info(f"Starting download for URL: {url[:50]}...")
-    start_time = time.time()
-    
-    try:
-        result = download_youtube_audio(url, app.config['UPLOAD_FOLDER'])
-        
-        # Store in database with user ownership
-        podcasts_db[result['id']] = {
-            'id': result['id'],
-            'user_id': current_user.id,
-            'title': result['title'],
-            'duration': result['duration'],
-            'file_path': result['file_path'],
-            'filename': result['filename'],
-            'status': 'downloaded',
-            'transcript': None,
-            'chunks': None
-        }
-        
-        elapsed = time.time() - start_time
-        logger.info(f"Download completed: '{result['title']}' ({result['duration']}s) in {elapsed:.1f}s")
-        
-        return jsonify({
-            'success': True,
-            'podcast_id': result['id'],
-            'title': result['title'],
-            'duration': result['duration'],
-            'message': 'Audio downloaded successfully'
-        })
-        
-    except Exception as e:
-        logger.error(f"Download failed for {url}: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    job_id = submit_job(current_user.id, download_podcast, url, current_user.id)
+    return jsonify({'success': True, 'job_id': job_id, 'message': 'Download started'}), 202
 
 
 @app.route('/api/transcribe/<podcast_id>', methods=['POST'])
 @login_required
 def transcribe(podcast_id):
-    """Transcribe downloaded audio using Smallest AI Pulse STT"""
-    if podcast_id not in podcasts_db:
+    """Start transcribing downloaded audio using Smallest AI Pulse STT in the background"""
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
         logger.warning(f"Transcription requested for unknown podcast: {podcast_id}")
         return jsonify({'error': 'Podcast not found'}), 404
     
-    podcast = podcasts_db[podcast_id]
-    
     # Verify ownership
-    if podcast.get('user_id') != current_user.id:
+    if record.user_id != current_user.id:
         return jsonify({'error': 'Podcast not found'}), 404
     
     if not SMALLEST_API_KEY:
         logger.error("Transcription failed: SMALLEST_API_KEY not configured")
         return jsonify({'error': 'SMALLEST_API_KEY not configured'}), 500
     
-    logger.info(f"Starting transcription for: '{podcast['title']}'")
-    start_time = time.time()
+    data = request.get_json() or {}
+    language = data.get('language', 'en')
     
-    try:
-        data = request.get_json() or {}
-        language = data.get('language', 'en')
-        
-        result = transcribe_audio(podcast['file_path'], language)
-        
-        transcript = result.get('transcription', '')
-        chunks = chunk_transcript(transcript)
-        
-        # Update database
-        podcast['transcript'] = transcript
-        podcast['chunks'] = chunks
-        podcast['utterances'] = result.get('utterances', [])
-        podcast['words'] = result.get('words', [])
-        podcast['status'] = 'transcribed'
-        
-        # Save transcript to file
-        transcript_path = app.config['TRANSCRIPTS_FOLDER'] / f'{podcast_id}_transcript.json'
-        with open(transcript_path, 'w') as f:
-            json.dump({
-                'id': podcast_id,
-                'user_id': podcast.get('user_id'),
-                'title': podcast['title'],
-                'duration': podcast.get('duration', 0),
-                'transcript': transcript,
-                'utterances': podcast['utterances'],
-                'words': podcast['words']
-            }, f, indent=2)
-        
-        elapsed = time.time() - start_time
-        word_count = len(transcript.split())
-        logger.info(f"Transcription completed: {word_count} words in {elapsed:.1f}s")
-        
-        return jsonify({
-            'success': True,
-            'transcript': transcript,
-            'word_count': word_count,
-            'message': 'Transcription completed'
-        })
-        
-    except Exception as e:
-        logger.error(f"Transcription failed for {podcast_id}: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    job_id = submit_job(current_user.id, transcribe_podcast, podcast_id, language)
+    return jsonify({'success': True, 'job_id': job_id, 'message': 'Transcription started'}), 202
+
+
+@app.route('/api/job/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Get the status of a background job, and its result once finished"""
+    job = db.session.get(Job, job_id)
+    
+    # Verify ownership
+    if not job or job.user_id != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job.to_dict())
 
 
 @app.route('/api/chat/<podcast_id>', methods=['POST'])
 @login_required
 def chat(podcast_id):
     """Chat with the podcast based on transcript using local LLM"""
-    if podcast_id not in podcasts_db:
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
         logger.warning(f"Chat requested for unknown podcast: {podcast_id}")
         return jsonify({'error': 'Podcast not found'}), 404
     
-    podcast = podcasts_db[podcast_id]
-    
     # Verify ownership
-    if podcast.get('user_id') != current_user.id:
+    if record.user_id != current_user.id:
         return jsonify({'error': 'Podcast not found'}), 404
     
+    podcast = load_podcast(record)
+    
     if not podcast.get('transcript'):
         logger.warning(f"Chat requested for non-transcribed podcast: {podcast_id}")
         return jsonify({'error': 'Podcast not transcribed yet'}), 400
@@ -905,41 +1617,78 @@ def chat(podcast_id):
     logger.info(f"Chat query for '{podcast['title']}': {query[:50]}...")
     start_time = time.time()
     
+    # Answer repeated or near-identical questions from the cache
+    # (only embedding the question when there is no exact match)
+    cache_key = get_chat_cache_key(query)
+    embedding = None
+    cached = get_cached_chat_response(podcast_id, cache_key)
+    if not cached:
+        embedding = get_query_embedding(query)
+        cached = get_cached_chat_response(podcast_id, cache_key, embedding)
+    
     try:
-        # Find relevant context from transcript chunks
-        context = find_relevant_context(query, podcast['chunks'])
+        if cached:
+            context = cached['context']
+        else:
+            # Find relevant context from transcript chunks
+            context = find_relevant_context(query, podcast_id, podcast['chunks'])
+    except Exception as e:
+        logger.error(f"Chat failed for {podcast_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        done_event = {
+            'done': True,
+            'context_used': context[:500] + '...' if len(context) > 500 else context,
+            'cached': cached is not None
+        }
         
-        # Generate response using local LLM (Ollama)
-        response = generate_chat_response(query, context, podcast['transcript'], podcast.get('title', 'the podcast'))
+        if cached:
+            logger.info("Chat response served from cache")
+            yield sse_event({'token': cached['response']})
+            yield sse_event(done_event)
+            return
         
-        elapsed = time.time() - start_time
-        logger.info(f"Chat response generated in {elapsed:.1f}s")
+        # Stream the response from the local LLM (Ollama) as it is generated
+        parts = []
+        try:
+            for token in stream_chat_response(query, context, podcast['transcript'], podcast.get('title', 'the podcast')):
+                parts.append(token)
+                yield sse_event({'token': token})
+        except Exception as e:
+            logger.error(f"Chat failed for {podcast_id}: {str(e)}")
+            yield sse_event({'error': str(e)})
+            return
         
-        return jsonify({
-            'success': True,
-            'response': response,
-            'context_used': context[:500] + '...' if len(context) > 500 else context
-        })
+        response = ''.join(parts) or 'No response generated'
+        cache_chat_response(podcast_id, cache_key, embedding, response, context)
         
-    except Exception as e:
-        logger.error(f"Chat failed for {podcast_id}: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        elapsed = time.time() - start_time
+        logger.info(f"Chat response generated in {elapsed:.1f}s")
+        yield sse_event(done_event)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @app.route('/api/ai-feature/<podcast_id>', methods=['POST'])
 @login_required
 def ai_feature(podcast_id):
     """Apply an AI feature to the podcast transcript using Ollama"""
-    if podcast_id not in podcasts_db:
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
         logger.warning(f"AI feature requested for unknown podcast: {podcast_id}")
         return jsonify({'error': 'Podcast not found'}), 404
     
-    podcast = podcasts_db[podcast_id]
-    
     # Verify ownership
-    if podcast.get('user_id') != current_user.id:
+    if record.user_id != current_user.id:
         return jsonify({'error': 'Podcast not found'}), 404
     
+    podcast = load_podcast(record)
+    
     if not podcast.get('transcript'):
         logger.warning(f"AI feature requested for non-transcribed podcast: {podcast_id}")
         return jsonify({'error': 'Podcast not transcribed yet'}), 400
@@ -955,93 +1704,116 @@ def ai_feature(podcast_id):
     start_time = time.time()
     
     try:
-        # Prepare the transcript (truncate if too long for context)
-        transcript = podcast['transcript']
-        max_transcript_length = 12000  # Limit to avoid token overflow
-        if len(transcript) > max_transcript_length:
-            transcript = transcript[:max_transcript_length] + "\n\n[Transcript truncated for processing...]"
-        
-        # Build the prompt
-        prompt = feature['prompt'].format(transcript=transcript)
-        
-        # Call Ollama
-        response = requests.post(
-            OLLAMA_URL,
-            json={
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "num_predict": 4000
-                }
-            },
-            timeout=180  # 3 minutes timeout for longer features
-        )
-        
-        if response.status_code != 200:
-            return jsonify({'error': f'Ollama returned status {response.status_code}. Make sure Ollama is running.'}), 500
-        
-        result = response.json()
-        ai_response = result.get('response', 'No response generated')
+        prompt = get_feature_prompt(podcast, feature_type)
+        cache_path = get_ai_feature_cache_path(podcast, prompt)
+        cached_result = load_ai_feature_result(cache_path)
+    except Exception as e:
+        logger.error(f"AI feature failed for {podcast_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        if cached_result is not None:
+            yield sse_event({'token': cached_result})
+        else:
+            # Stream the result from the local LLM (Ollama) as it is generated
+            parts = []
+            try:
+                for token in stream_ollama_response(prompt, num_predict=AI_FEATURE_NUM_PREDICT, timeout=180):
+                    parts.append(token)
+                    yield sse_event({'token': token})
+            except Exception as e:
+                logger.error(f"AI feature failed for {podcast_id}: {str(e)}")
+                yield sse_event({'error': str(e)})
+                return
+            
+            save_ai_feature_result(cache_path, feature_type, ''.join(parts) or 'No response generated')
         
         elapsed = time.time() - start_time
-        logger.info(f"AI feature '{feature['name']}' completed in {elapsed:.1f}s")
-        
-        return jsonify({
-            'success': True,
+        logger.info(f"AI feature '{feature['name']}' completed in {elapsed:.1f}s{' (cached)' if cached_result is not None else ''}")
+        yield sse_event({
+            'done': True,
             'feature': feature_type,
             'feature_name': feature['name'],
-            'result': ai_response,
-            'processing_time': round(elapsed, 2)
+            'processing_time': round(elapsed, 2),
+            'cached': cached_result is not None
         })
-        
-    except requests.exceptions.ConnectionError:
-        return jsonify({'error': 'Cannot connect to Ollama. Make sure Ollama is running (ollama serve).'}), 500
-    except Exception as e:
-        logger.error(f"AI feature failed for {podcast_id}: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/ai-features-batch/<podcast_id>', methods=['POST'])
+@login_required
+def ai_features_batch(podcast_id):
+    """Apply several AI features to the podcast transcript, running them concurrently"""
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
+        logger.warning(f"AI features requested for unknown podcast: {podcast_id}")
+        return jsonify({'error': 'Podcast not found'}), 404
+    
+    # Verify ownership
+    if record.user_id != current_user.id:
+        return jsonify({'error': 'Podcast not found'}), 404
+    
+    podcast = load_podcast(record)
+    
+    if not podcast.get('transcript'):
+        logger.warning(f"AI features requested for non-transcribed podcast: {podcast_id}")
+        return jsonify({'error': 'Podcast not transcribed yet'}), 400
+    
+    data = request.get_json()
+    feature_types = data.get('features') if isinstance(data, dict) else None
+    
+    if not isinstance(feature_types, list) or not feature_types or \
+            any(not isinstance(feature_type, str) or feature_type not in AI_FEATURE_PROMPTS
+                for feature_type in feature_types):
+        return jsonify({'error': f'Invalid feature types. Available: {list(AI_FEATURE_PROMPTS.keys())}'}), 400
+    
+    feature_types = list(dict.fromkeys(feature_types))  # Drop duplicates, keep order
+    logger.info(f"AI features {feature_types} for '{podcast['title']}'")
+    start_time = time.time()
+    
+    # Ollama calls are network-bound, so threads let Ollama work on several
+    # features at once (up to its OLLAMA_NUM_PARALLEL setting)
+    with ThreadPoolExecutor(max_workers=min(len(feature_types), AI_FEATURE_BATCH_MAX_WORKERS)) as executor:
+        futures = {
+            feature_type: executor.submit(get_ai_feature_result, podcast, feature_type)
+            for feature_type in feature_types
+        }
+    
+    results = {}
+    for feature_type, future in futures.items():
+        feature_name = AI_FEATURE_PROMPTS[feature_type]['name']
+        try:
+            ai_response, cached = future.result()
+            results[feature_type] = {'feature_name': feature_name, 'result': ai_response, 'cached': cached}
+        except requests.exceptions.ConnectionError:
+            results[feature_type] = {'feature_name': feature_name, 'error': 'Cannot connect to Ollama. Make sure Ollama is running (ollama serve).'}
+        except Exception as e:
+            logger.error(f"AI feature '{feature_type}' failed for {podcast_id}: {str(e)}")
+            results[feature_type] = {'feature_name': feature_name, 'error': str(e)}
+    
+    elapsed = time.time() - start_time
+    logger.info(f"AI features batch completed in {elapsed:.1f}s")
+    
+    return jsonify({
+        'success': True,
+        'results': results,
+        'processing_time': round(elapsed, 2)
+    })
 
 
 @app.route('/api/ai-features', methods=['GET'])
 def list_ai_features():
     """List all available AI features"""
-    features = {
-        'popular': [
-            {'id': 'summary', 'name': 'Summary', 'description': 'Comprehensive overview'},
-            {'id': 'key_insights', 'name': 'Key Insights', 'description': 'Main takeaways'},
-            {'id': 'clean_transcript', 'name': 'Clean Transcript', 'description': 'Remove filler words'},
-            {'id': 'proper_notes', 'name': 'Proper Notes', 'description': 'Comprehensive notes'}
-        ],
-        'basic_content': [
-            {'id': 'clean_transcript', 'name': 'Clean Transcript', 'description': 'Remove filler words'},
-            {'id': 'micro_summary', 'name': 'Micro Summary', 'description': '2-3 sentences'},
-            {'id': 'short_summary', 'name': 'Short Summary', 'description': 'Brief paragraph'},
-            {'id': 'bullet_points', 'name': 'Bullet Points', 'description': 'Key points as bullets'},
-            {'id': 'summary', 'name': 'Summary', 'description': 'Full summary'},
-            {'id': 'key_insights', 'name': 'Key Insights', 'description': 'Main takeaways'},
-            {'id': 'notable_quotes', 'name': 'Notable Quotes', 'description': 'Memorable quotes'}
-        ],
-        'analysis': [
-            {'id': 'extract_ideas', 'name': 'Extract Ideas', 'description': 'All distinct ideas'},
-            {'id': 'extract_insights', 'name': 'Extract Insights', 'description': 'Deeper insights'},
-            {'id': 'extract_patterns', 'name': 'Extract Patterns', 'description': 'Recurring themes'},
-            {'id': 'extract_wisdom', 'name': 'Extract Wisdom', 'description': 'Life lessons'}
-        ],
-        'study_education': [
-            {'id': 'flashcards', 'name': 'Flashcards', 'description': 'Study cards'},
-            {'id': 'concept_map', 'name': 'Concept Map', 'description': 'Visual relationships'},
-            {'id': 'qa', 'name': 'Q&A', 'description': 'Questions and answers'},
-            {'id': 'outline_notes', 'name': 'Outline Notes', 'description': 'Structured outline'},
-            {'id': 'cornell_notes', 'name': 'Cornell Notes', 'description': 'Cornell format'},
-            {'id': 'rapid_logging', 'name': 'Rapid Logging', 'description': 'Bullet journal style'},
-            {'id': 't_note_method', 'name': 'T-Note Method', 'description': 'Two-column notes'},
-            {'id': 'charting_method', 'name': 'Charting Method', 'description': 'Table format'},
-            {'id': 'qec_method', 'name': 'QEC Method', 'description': 'Question-Evidence-Conclusion'},
-            {'id': 'qa_split_page', 'name': 'Q&A Split Page', 'description': 'Side-by-side Q&A'}
-        ]
-    }
-    return jsonify({'features': features})
+    return Response(
+        AI_FEATURES_JSON,
+        mimetype='application/json',
+        headers={'Cache-Control': 'public, max-age=3600'}
+    )
 
 
 @app.route('/api/podcasts', methods=['GET'])
@@ -1049,16 +1821,13 @@ def list_ai_features():
 def list_podcasts():
     """List all downloaded podcasts for current user"""
     podcasts = []
-    for pid, podcast in podcasts_db.items():
-        # Only show podcasts belonging to current user
-        if podcast.get('user_id') != current_user.id:
-            continue
+    for podcast in db.session.scalars(select(Podcast).where(Podcast.user_id == current_user.id).order_by(Podcast.saved_at)):
         podcasts.append({
-            'id': podcast['id'],
-            'title': podcast['title'],
-            'duration': podcast['duration'],
-            'status': podcast['status'],
-            'has_transcript': podcast['transcript'] is not None
+            'id': podcast.id,
+            'title': podcast.title,
+            'duration': podcast.duration,
+            'status': podcast.status,
+            'has_transcript': podcast.status == 'transcribed'
         })
     return jsonify({'podcasts': podcasts})
 
@@ -1067,22 +1836,21 @@ def list_podcasts():
 @login_required
 def get_podcast(podcast_id):
     """Get podcast details"""
-    if podcast_id not in podcasts_db:
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
         return jsonify({'error': 'Podcast not found'}), 404
     
-    podcast = podcasts_db[podcast_id]
-    
     # Verify ownership
-    if podcast.get('user_id') != current_user.id:
+    if record.user_id != current_user.id:
         return jsonify({'error': 'Podcast not found'}), 404
     
     return jsonify({
-        'id': podcast['id'],
-        'title': podcast['title'],
-        'duration': podcast['duration'],
-        'status': podcast['status'],
-        'has_transcript': podcast['transcript'] is not None,
-        'transcript_preview': podcast['transcript'][:500] if podcast['transcript'] else None
+        'id': record.id,
+        'title': record.title,
+        'duration': record.duration,
+        'status': record.status,
+        'has_transcript': record.status == 'transcribed',
+        'transcript_preview': record.transcript_preview_200
     })
 
 
@@ -1090,39 +1858,36 @@ def get_podcast(podcast_id):
 @login_required
 def delete_podcast(podcast_id):
     """Delete a podcast"""
-    if podcast_id not in podcasts_db:
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
         return jsonify({'error': 'Podcast not found'}), 404
     
-    podcast = podcasts_db[podcast_id]
-    
     # Verify ownership
-    if podcast.get('user_id') != current_user.id:
+    if record.user_id != current_user.id:
         return jsonify({'error': 'Podcast not found'}), 404
     
-    # Delete audio file
-    try:
-        if os.path.exists(podcast['file_path']):
-            os.remove(podcast['file_path'])
-    except Exception:
-        pass
+    # Delete the record first, so a transcription finishing meanwhile sees it
+    # is gone and cleans up after itself
+    file_path = record.file_path
+    db.session.execute(delete(Podcast).where(Podcast.id == podcast_id))
+    db.session.commit()
     
-    # Delete transcript file
-    transcript_path = app.config['TRANSCRIPTS_FOLDER'] / f'{podcast_id}_transcript.json'
-    try:
-        if transcript_path.exists():
-            transcript_path.unlink()
-    except Exception:
-        pass
-    
-    del podcasts_db[podcast_id]
+    # Delete audio and transcript files
+    if file_path:
+        Path(file_path).unlink(missing_ok=True)
+    delete_transcript_data(podcast_id)
+    delete_ai_feature_results(podcast_id)
     
     return jsonify({'success': True, 'message': 'Podcast deleted'})
 
 
 @app.route('/downloads/<filename>')
 def serve_audio(filename):
-    """Serve downloaded audio files"""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """Serve downloaded audio files, with range requests so players can seek"""
+    return send_from_directory(
+        app.config['UPLOAD_FOLDER'], filename,
+        conditional=True, etag=True, max_age=3600
+    )
 
 
 @app.route('/api/history', methods=['GET'])
@@ -1130,29 +1895,32 @@ def serve_audio(filename):
 def get_history():
     """Get saved podcasts for current user"""
     history = []
-    for pid, podcast in podcasts_db.items():
-        # Only show podcasts belonging to current user
-        if podcast.get('user_id') != current_user.id:
-            continue
-        file_size_mb = None
-        if podcast.get('file_size'):
-            file_size_mb = round(podcast['file_size'] / (1024 * 1024), 1)
-        elif podcast.get('file_path') and os.path.exists(podcast['file_path']):
-            file_size_mb = round(os.path.getsize(podcast['file_path']) / (1024 * 1024), 1)
+    podcasts = db.session.scalars(
+        select(Podcast).where(Podcast.user_id == current_user.id).order_by(Podcast.saved_at.desc())
+    ).all()
+    for podcast in podcasts:
+        if podcast.file_size is None and podcast.file_path:
+            # Stat once and remember it, for podcasts stored without a size
+            try:
+                podcast.file_size = os.path.getsize(podcast.file_path)
+            except OSError:
+                podcast.file_size = 0
+        file_size_mb = round(podcast.file_size / (1024 * 1024), 1) if podcast.file_size else None
         
         history.append({
-            'id': podcast['id'],
-            'title': podcast['title'],
-            'duration': podcast.get('duration', 0),
-            'status': podcast['status'],
-            'has_transcript': podcast.get('transcript') is not None,
-            'transcript_preview': podcast['transcript'][:200] + '...' if podcast.get('transcript') and len(podcast['transcript']) > 200 else podcast.get('transcript'),
+            'id': podcast.id,
+            'title': podcast.title,
+            'duration': podcast.duration or 0,
+            'status': podcast.status,
+            'has_transcript': podcast.status == 'transcribed',
+            'transcript_preview': podcast.transcript_preview_200,
             'file_size_mb': file_size_mb,
-            'saved_at': podcast.get('saved_at')
+            'saved_at': podcast.saved_at
         })
     
-    # Sort by saved_at (newest first)
-    history.sort(key=lambda x: x.get('saved_at') or 0, reverse=True)
+    if db.session.dirty:
+        db.session.commit()
+    
     return jsonify({'history': history})
 
 
@@ -1160,15 +1928,16 @@ def get_history():
 @login_required
 def load_from_history(podcast_id):
     """Load a podcast from history for chatting"""
-    if podcast_id not in podcasts_db:
+    record = db.session.get(Podcast, podcast_id)
+    if record is None:
         return jsonify({'error': 'Podcast not found in history'}), 404
     
-    podcast = podcasts_db[podcast_id]
-    
     # Verify ownership
-    if podcast.get('user_id') != current_user.id:
+    if record.user_id != current_user.id:
         return jsonify({'error': 'Podcast not found in history'}), 404
     
+    podcast = load_podcast(record)
+    
     return jsonify({
         'success': True,
         'podcast_id': podcast['id'],
@@ -1177,7 +1946,7 @@ def load_from_history(podcast_id):
         'status': podcast['status'],
         'has_transcript': podcast.get('transcript') is not None,
         'transcript': podcast.get('transcript'),
-        'word_count': len(podcast['transcript'].split()) if podcast.get('transcript') else 0
+        'word_count': podcast.get('word_count', 0)
     })
 
 
@@ -1189,9 +1958,9 @@ if __name__ == '__main__':
     # Auto-start Ollama
     start_ollama()
     
-    # Load saved podcasts from disk
-    load_saved_podcasts()
-    logger.info(f"Loaded {len(podcasts_db)} saved podcast(s)")
+    # Import podcasts saved to disk before they were stored in the database
+    with app.app_context():
+        import_saved_podcasts()
     
     if not SMALLEST_API_KEY:
         logger.warning("SMALLEST_API_KEY not set! Set it in .env file")
@@ -6,6 +6,7 @@ import secrets
 import logging
 from flask import Blueprint, render_template, redirect, url_for, request, jsonify
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from sqlalchemy import select, event
 from models import db, User
 
 logger = logging.getLogger(__name__)
@@ -45,10 +46,23 @@ def init_auth(app):
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Flask-Login calls this at most once per request; session.get checks
+        # the identity map before querying
+        return db.session.get(User, int(user_id))
     
     # Create database tables
     with app.app_context():
+        # WAL lets readers and a writer work concurrently; NORMAL sync is
+        # safe in WAL mode and avoids an fsync on every commit
+        @event.listens_for(db.engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+            cursor.execute('PRAGMA mmap_size=268435456')
+            cursor.close()
+        
         db.create_all()
     
     # Register auth blueprint
@@ -100,9 +114,8 @@ def email_signup():
     if len(password) < 8:
         return jsonify({'error': 'Password must be at least 8 characters'}), 400
     
-    # Check if user exists
-    existing_user = User.query.filter_by(email=email).first()
-    if existing_user:
+    # Check if user exists (without loading it)
+    if db.session.scalar(select(1).where(User.email == email).limit(1)) is not None:
         return jsonify({'error': 'An account with this email already exists'}), 400
     
     # Create new user
@@ -129,11 +142,15 @@ def email_login():
     if not email or not password:
         return jsonify({'error': 'Email and password are required'}), 400
     
-    user = User.query.filter_by(email=email).first()
+    user = db.session.scalar(select(User).where(User.email == email).limit(1))
     
     if not user or not user.check_password(password):
         return jsonify({'error': 'Invalid email or password'}), 401
     
+    # Commit only when check_password rehashed the password
+    if db.session.dirty:
+        db.session.commit()
+    
     login_user(user)
     logger.info(f"User logged in: {email}")
     
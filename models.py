@@ -1,13 +1,22 @@
 """
-User model and database configuration for authentication
+User, podcast and job models, transcript search index and database configuration
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from datetime import datetime, timedelta
 
 db = SQLAlchemy()
 
+# Argon2id password hashing; raise time_cost if logins can afford more
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2)
+
+# last_login is only rewritten once it is older than this
+LAST_LOGIN_RESOLUTION = timedelta(minutes=5)
+
 
 class User(UserMixin, db.Model):
     """User model for authentication"""
@@ -32,18 +41,37 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        """Check password against hash"""
+        """Check password against hash
+        
+        Hashes from older werkzeug (PBKDF2/scrypt) accounts and outdated argon2
+        parameters are upgraded on a successful check; the caller commits.
+        """
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, password)
+        
+        if self.password_hash.startswith('$argon2'):
+            try:
+                password_hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            needs_rehash = password_hasher.check_needs_rehash(self.password_hash)
+        else:
+            if not check_password_hash(self.password_hash, password):
+                return False
+            needs_rehash = True
+        
+        if needs_rehash:
+            self.set_password(password)
+        return True
     
     def update_last_login(self):
-        """Update last login timestamp"""
-        self.last_login = datetime.utcnow()
-        db.session.commit()
+        """Update last login timestamp, at most every few minutes; the caller commits"""
+        now = datetime.utcnow()
+        if not self.last_login or now - self.last_login > LAST_LOGIN_RESOLUTION:
+            self.last_login = now
     
     @staticmethod
     def get_or_create_oauth_user(email, name, avatar_url, provider, oauth_id):
@@ -56,6 +84,8 @@ class User(UserMixin, db.Model):
                 user.auth_provider = provider
                 user.oauth_id = oauth_id
             user.update_last_login()
+            if db.session.dirty:
+                db.session.commit()
             return user
         
         # Create new user
@@ -84,3 +114,148 @@ class User(UserMixin, db.Model):
     
     def __repr__(self):
         return f'<User {self.email}>'
+
+
+class Podcast(db.Model):
+    """Podcast metadata; transcripts themselves are stored in transcript files"""
+    __tablename__ = 'podcasts'
+    __table_args__ = (db.Index('ix_podcasts_user_saved', 'user_id', 'saved_at'),)
+    
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    title = db.Column(db.String(500), nullable=False, default='Unknown')
+    duration = db.Column(db.Float, default=0)
+    status = db.Column(db.String(20), nullable=False, default='downloaded')  # downloaded, transcribed
+    
+    # Audio file
+    file_path = db.Column(db.String(1000), nullable=True)
+    filename = db.Column(db.String(500), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)
+    
+    # Transcript stats for listings
+    word_count = db.Column(db.Integer, default=0)
+    transcript_preview_200 = db.Column(db.Text, nullable=True)
+    
+    saved_at = db.Column(db.Float, nullable=True)  # Unix timestamp
+    
+    def to_dict(self):
+        """Convert podcast metadata to dictionary"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'title': self.title,
+            'duration': self.duration,
+            'status': self.status,
+            'file_path': self.file_path,
+            'filename': self.filename,
+            'file_size': self.file_size,
+            'word_count': self.word_count,
+            'transcript_preview_200': self.transcript_preview_200,
+            'saved_at': self.saved_at
+        }
+    
+    def __repr__(self):
+        return f'<Podcast {self.id}>'
+
+
+class Job(db.Model):
+    """Background job status and result, stored so any app process can answer polls"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='running', index=True)  # running, completed, failed
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.Float, nullable=False)  # Unix timestamp
+    
+    def to_dict(self):
+        """Convert job status to dictionary"""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id}>'
+
+
+# ============ Transcript Search Index ============
+
+def init_transcript_index():
+    """Create the FTS5 table holding searchable transcript chunks
+    
+    podcast_id is indexed so queries can restrict MATCH to one podcast; tables
+    created with it UNINDEXED are rebuilt with their rows kept.
+    """
+    row = db.session.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'transcript_chunks'"
+    )).first()
+    if row and 'UNINDEXED' in row[0]:
+        db.session.execute(text('CREATE VIRTUAL TABLE transcript_chunks_new USING fts5(podcast_id, chunk)'))
+        db.session.execute(text(
+            'INSERT INTO transcript_chunks_new (podcast_id, chunk) SELECT podcast_id, chunk FROM transcript_chunks'
+        ))
+        db.session.execute(text('DROP TABLE transcript_chunks'))
+        db.session.execute(text('ALTER TABLE transcript_chunks_new RENAME TO transcript_chunks'))
+    else:
+        db.session.execute(text(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS transcript_chunks USING fts5(podcast_id, chunk)'
+        ))
+    db.session.commit()
+
+
+def podcast_match(podcast_id):
+    """Get an FTS5 query matching only a podcast's chunks"""
+    return 'podcast_id : "{}"'.format(podcast_id.replace('"', '""'))
+
+
+def index_transcript_chunks(podcast_id, chunks):
+    """Replace the indexed chunks for a podcast"""
+    db.session.execute(
+        text('DELETE FROM transcript_chunks WHERE transcript_chunks MATCH :match'),
+        {'match': podcast_match(podcast_id)}
+    )
+    if chunks:
+        db.session.execute(
+            text('INSERT INTO transcript_chunks (podcast_id, chunk) VALUES (:podcast_id, :chunk)'),
+            [{'podcast_id': podcast_id, 'chunk': chunk} for chunk in chunks]
+        )
+    db.session.commit()
+
+
+def delete_transcript_chunks(podcast_id):
+    """Remove a podcast's chunks from the search index"""
+    db.session.execute(
+        text('DELETE FROM transcript_chunks WHERE transcript_chunks MATCH :match'),
+        {'match': podcast_match(podcast_id)}
+    )
+    db.session.commit()
+
+
+def get_indexed_podcast_ids():
+    """Get the ids of all podcasts that have indexed chunks"""
+    rows = db.session.execute(text('SELECT DISTINCT podcast_id FROM transcript_chunks'))
+    return {row[0] for row in rows}
+
+
+def search_transcript_chunks(podcast_id, terms, top_k=3):
+    """Get a podcast's best matching chunks for the given terms, ranked by BM25"""
+    if not terms:
+        return []
+    # Quote every term so user input is never parsed as FTS5 query syntax.
+    # The podcast filter is part of the MATCH, so only that podcast's chunks
+    # are searched; podcast_id gets no weight in the ranking
+    terms_match = ' OR '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    match = f'{podcast_match(podcast_id)} AND chunk : ({terms_match})'
+    rows = db.session.execute(
+        text(
+            'SELECT chunk FROM transcript_chunks '
+            'WHERE transcript_chunks MATCH :match '
+            'ORDER BY bm25(transcript_chunks, 0, 1) LIMIT :top_k'
+        ),
+        {'match': match, 'top_k': top_k}
+    )
+    return [row[0] for row in rows]